@@ -1,17 +1,34 @@
 from __future__ import annotations
 
+from collections import Counter
+import os
 from pathlib import Path
 from typing import Optional
 
 import typer
-from dotenv import load_dotenv
-
-from .models import Decision
-from .reconciliation import run_reconciliation
 
 app = typer.Typer(help="Validation Reconciliation Agent (VRA) CLI.")
 
 
+def _load_env_file(env_file: Path) -> None:
+    # Minimal KEY=VALUE reader; values already exported in the shell win.
+    for raw_line in env_file.read_text(encoding="utf-8").splitlines():
+        line = raw_line.strip()
+        if line.startswith("export "):
+            line = line[len("export ") :].lstrip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, _, value = line.partition("=")
+        value = value.strip()
+        closing = value.find(value[0], 1) if value[:1] in {'"', "'"} else -1
+        if closing > 0:
+            # Quoted value: anything after the closing quote (e.g. a comment) is dropped.
+            value = value[1:closing]
+        elif " #" in value:
+            value = value.split(" #", 1)[0].rstrip()
+        os.environ.setdefault(key.strip(), value)
+
+
 @app.callback()
 def main() -> None:
     """Root command group for VRA."""
@@ -37,8 +54,12 @@ def run_reconciliation_command(
         help="Path to dotenv file containing GEMINI_API_KEY.",
     ),
 ) -> None:
+    # Deferred so `vra --help` does not pay for pydantic and PyMuPDF imports.
+    from .models import Decision
+    from .reconciliation import run_reconciliation
+
     if env_file.exists():
-        load_dotenv(dotenv_path=env_file)
+        _load_env_file(env_file)
 
     if not protocol.exists():
         raise typer.BadParameter(f"Protocol PDF not found: {protocol}")
@@ -72,9 +93,10 @@ def run_reconciliation_command(
     )
 
     total = len(rows)
-    pass_count = sum(1 for r in rows if r.decision == Decision.PASS)
-    fail_count = sum(1 for r in rows if r.decision == Decision.FAIL)
-    unset_count = sum(1 for r in rows if r.decision == Decision.UNSET)
+    counts = Counter(r.decision for r in rows)
+    pass_count = counts[Decision.PASS]
+    fail_count = counts[Decision.FAIL]
+    unset_count = counts[Decision.UNSET]
 
     typer.echo("Reconciliation complete.")
     typer.echo(f"Rows processed: {total}")
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, List, Optional, Tuple
+import sys
+from typing import Any, Dict, List, Optional, Tuple
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel
+
+# Row types are plain dataclasses: they are built in bulk and never cross a
+# validation boundary. slots= needs Python 3.10+.
+_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
 
 class Decision(str, Enum):
@@ -17,22 +23,24 @@ class ComparisonResult(BaseModel):
     match: bool
     reason: str
     confidence: Optional[float] = None
+    # Evidence tag for the row: "vlm_compare", or "identical_crops" when no model call was made.
+    source: str = "vlm_compare"
 
 
-class ProtocolRow(BaseModel):
+@dataclass(**_SLOTS)
+class ProtocolRow:
     repeat_id: int
     difference_id: int
     page_index: int
     radio_group_name: str
-    widget_indices: Dict[str, int] = Field(
-        default_factory=dict,
-        description="Radio widget index keyed by export value: PASS/FAIL/N#2FA",
-    )
+    # Radio widget index keyed by export value: PASS/FAIL/N#2FA
+    widget_indices: Dict[str, int] = field(default_factory=dict)
     master_bbox: Optional[Tuple[float, float, float, float]] = None
     sample_bbox: Optional[Tuple[float, float, float, float]] = None
 
 
-class ReportBlock(BaseModel):
+@dataclass(**_SLOTS)
+class ReportBlock:
     repeat_id: int
     difference_id: int
     page_index: int
@@ -41,15 +49,15 @@ class ReportBlock(BaseModel):
     sample_bbox: Optional[Tuple[float, float, float, float]] = None
 
 
-class ReconciliationRow(BaseModel):
+@dataclass(**_SLOTS)
+class ReconciliationRow:
     repeat_id: int
     difference_id: int
     decision: Decision
     match: bool
     confidence: Optional[float] = None
     reason: str = ""
-    evidence: List[str] = Field(default_factory=list)
+    evidence: List[str] = field(default_factory=list)
     protocol_page_index: Optional[int] = None
     protocol_widget_name: Optional[str] = None
     report_page_index: Optional[int] = None
-
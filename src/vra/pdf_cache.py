@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict
+
+import fitz
+
+# Read-only document handles shared across extraction and crop rendering.
+# Callers that modify a document must open their own copy.
+_DOCUMENTS: Dict[str, fitz.Document] = {}
+
+
+def open_pdf(pdf_path: Path) -> fitz.Document:
+    key = str(Path(pdf_path).resolve())
+    doc = _DOCUMENTS.get(key)
+    if doc is None or doc.is_closed:
+        doc = fitz.open(pdf_path)
+        _DOCUMENTS[key] = doc
+    return doc
+
+
+def close_all() -> None:
+    for doc in _DOCUMENTS.values():
+        if not doc.is_closed:
+            doc.close()
+    _DOCUMENTS.clear()
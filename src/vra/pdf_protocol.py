@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from collections import OrderedDict
 from pathlib import Path
 import re
 from typing import Dict, List, Optional, Tuple
@@ -8,6 +7,8 @@ from typing import Dict, List, Optional, Tuple
 import fitz
 
 from .models import ProtocolRow
+from .pdf_cache import open_pdf
+from .pdf_render import DEFAULT_ZOOM, render_page_regions
 
 
 TABLE_HEADER = "4.1-6 GRA-BAR-BRL-PQ Difference TABLE III"
@@ -58,103 +59,81 @@ def extract_protocol_rows(protocol_pdf: Path, test_id: str) -> List[ProtocolRow]
     if test_id != "4.1-6":
         raise ValueError(f"Unsupported test-id '{test_id}'. MVP supports only 4.1-6.")
 
-    doc = fitz.open(protocol_pdf)
-    try:
-        header_pages: List[int] = []
-        for page_idx in range(len(doc)):
-            if TABLE_HEADER in doc[page_idx].get_text():
-                header_pages.append(page_idx)
-        if not header_pages:
-            raise RuntimeError(f"Could not find table header '{TABLE_HEADER}' in protocol PDF.")
-
-        candidate_pages = list(range(header_pages[0], len(doc)))
-        rows: List[ProtocolRow] = []
-        row_counter = 0
-
-        for page_idx in candidate_pages:
-            page = doc[page_idx]
-            page_widgets = list(page.widgets())
-            if not page_widgets:
+    doc = open_pdf(protocol_pdf)
+    first_header: Optional[int] = None
+    for page_idx in range(len(doc)):
+        if TABLE_HEADER in doc[page_idx].get_text():
+            first_header = page_idx
+            break
+    if first_header is None:
+        raise RuntimeError(f"Could not find table header '{TABLE_HEADER}' in protocol PDF.")
+
+    candidate_pages = range(first_header, len(doc))
+    rows: List[ProtocolRow] = []
+    row_counter = 0
+
+    for page_idx in candidate_pages:
+        page = doc[page_idx]
+        # Single pass: export-value indices and vertical extent per radio group.
+        widget_indices_by_field: Dict[str, Dict[str, int]] = {}
+        y_extents: Dict[str, List[float]] = {}
+        for i, widget in enumerate(page.widgets()):
+            field_name = widget.field_name or ""
+            if WIDGET_PATTERN not in field_name or test_id not in field_name:
                 continue
-
-            grouped: Dict[str, List[Tuple[int, fitz.Widget]]] = OrderedDict()
-            for i, widget in enumerate(page_widgets):
-                field_name = getattr(widget, "field_name", "") or ""
-                if WIDGET_PATTERN not in field_name or test_id not in field_name:
-                    continue
-                grouped.setdefault(field_name, []).append((i, widget))
-
-            parsed_rows: List[
-                Tuple[float, int, str, Dict[str, int], Tuple[float, float], Tuple[float, float]]
-            ] = []
-            for field_name, widget_entries in grouped.items():
-                master_col, sample_col = _column_bounds(page)
-                widget_indices: Dict[str, int] = {}
-                ys: List[float] = []
-                for index, widget in widget_entries:
-                    export_value = _extract_export_value(widget)
-                    if export_value != "Off":
-                        widget_indices[export_value] = index
-                    ys.append(widget.rect.y0)
-                    ys.append(widget.rect.y1)
-                row_top = max(0.0, min(ys) - 2.0) if ys else 0.0
-                parsed_rows.append(
-                    (
+            widget_indices = widget_indices_by_field.setdefault(field_name, {})
+            export_value = _extract_export_value(widget)
+            if export_value != "Off":
+                widget_indices[export_value] = i
+            rect = widget.rect
+            extent = y_extents.get(field_name)
+            if extent is None:
+                y_extents[field_name] = [min(rect.y0, rect.y1), max(rect.y0, rect.y1)]
+            else:
+                extent[0] = min(extent[0], rect.y0, rect.y1)
+                extent[1] = max(extent[1], rect.y0, rect.y1)
+        if not y_extents:
+            continue
+
+        master_col, sample_col = _column_bounds(page)
+        page_height = page.rect.height
+        ordered_fields = sorted(
+            y_extents,
+            key=lambda name: (max(0.0, y_extents[name][0] - 2.0), _field_sort_number(name)),
+        )
+        for field_name in ordered_fields:
+            top_y, bottom_y = y_extents[field_name]
+            row_top = max(0.0, top_y - 2.0)
+            row_bottom = min(page_height, bottom_y + 2.0)
+            widget_indices = widget_indices_by_field[field_name]
+            row_counter += 1
+            repeat_id = ((row_counter - 1) // 19) + 1
+            difference_id = ((row_counter - 1) % 19) + 1
+            rows.append(
+                ProtocolRow(
+                    repeat_id=repeat_id,
+                    difference_id=difference_id,
+                    page_index=page_idx,
+                    radio_group_name=field_name,
+                    widget_indices=widget_indices,
+                    master_bbox=(
+                        master_col[0],
                         row_top,
-                        _field_sort_number(field_name),
-                        field_name,
-                        widget_indices,
-                        (master_col[0], master_col[1]),
-                        (sample_col[0], sample_col[1]),
-                    )
-                )
-
-            parsed_rows.sort(key=lambda item: (item[0], item[1]))
-            for (
-                row_top,
-                _field_num,
-                field_name,
-                widget_indices,
-                master_col,
-                sample_col,
-            ) in parsed_rows:
-                row_counter += 1
-                repeat_id = ((row_counter - 1) // 19) + 1
-                difference_id = ((row_counter - 1) % 19) + 1
-                row_widgets = grouped[field_name]
-                ys = [
-                    value
-                    for _, widget in row_widgets
-                    for value in (widget.rect.y0, widget.rect.y1)
-                ]
-                row_bottom = min(page.rect.height, max(ys) + 2.0) if ys else row_top
-                rows.append(
-                    ProtocolRow(
-                        repeat_id=repeat_id,
-                        difference_id=difference_id,
-                        page_index=page_idx,
-                        radio_group_name=field_name,
-                        widget_indices=widget_indices,
-                        master_bbox=(
-                            master_col[0],
-                            row_top,
-                            master_col[1],
-                            row_bottom,
-                        ),
-                        sample_bbox=(
-                            sample_col[0],
-                            row_top,
-                            sample_col[1],
-                            row_bottom,
-                        ),
-                    )
+                        master_col[1],
+                        row_bottom,
+                    ),
+                    sample_bbox=(
+                        sample_col[0],
+                        row_top,
+                        sample_col[1],
+                        row_bottom,
+                    ),
                 )
+            )
 
-        if not rows:
-            raise RuntimeError("No matching 4.1-6 radio groups were discovered in protocol PDF.")
-        return rows
-    finally:
-        doc.close()
+    if not rows:
+        raise RuntimeError("No matching 4.1-6 radio groups were discovered in protocol PDF.")
+    return rows
 
 
 def render_protocol_crop(
@@ -162,18 +141,9 @@ def render_protocol_crop(
     page_index: int,
     bbox: Tuple[float, float, float, float],
     out_path: Path,
-    zoom: float = 2.0,
+    zoom: float = DEFAULT_ZOOM,
 ) -> Path:
-    doc = fitz.open(protocol_pdf)
-    try:
-        page = doc[page_index]
-        rect = fitz.Rect(*bbox)
-        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=rect)
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        pix.save(out_path)
-        return out_path
-    finally:
-        doc.close()
+    return render_page_regions(protocol_pdf, page_index, [(bbox, out_path)], zoom=zoom)[0]
 
 
 def apply_pass_fail_value(
@@ -181,31 +151,36 @@ def apply_pass_fail_value(
     protocol_pdf_out: Path,
     decisions: Dict[Tuple[int, int], str],
     test_id: str,
+    protocol_rows: List[ProtocolRow],
 ) -> None:
     if test_id != "4.1-6":
         raise ValueError(f"Unsupported test-id '{test_id}'. MVP supports only 4.1-6.")
 
+    row_lookup = {(r.repeat_id, r.difference_id): r for r in protocol_rows}
+    page_updates: Dict[int, Dict[str, str]] = {}
+    for key, export_value in decisions.items():
+        row = row_lookup.get(key)
+        if row is None:
+            continue
+        page_updates.setdefault(row.page_index, {})[row.radio_group_name] = export_value
+
     doc = fitz.open(protocol_pdf_in)
     try:
-        rows = extract_protocol_rows(protocol_pdf_in, test_id=test_id)
-        row_lookup = {(r.repeat_id, r.difference_id): r for r in rows}
-
-        for (repeat_id, difference_id), export_value in decisions.items():
-            row = row_lookup.get((repeat_id, difference_id))
-            if row is None:
-                continue
-
-            page = doc[row.page_index]
-            for widget in page.widgets():
-                if (getattr(widget, "field_name", "") or "") != row.radio_group_name:
+        for page_index, field_values in page_updates.items():
+            for widget in doc[page_index].widgets():
+                export_value = field_values.get(widget.field_name)
+                if export_value is None:
                     continue
                 normal_states = widget.button_states().get("normal", [])
                 if export_value in normal_states:
                     widget.field_value = export_value
                     widget.update()
+                    del field_values[widget.field_name]
+                    if not field_values:
+                        # Every decision on this page is applied; skip remaining widgets.
+                        break
 
         protocol_pdf_out.parent.mkdir(parents=True, exist_ok=True)
         doc.save(protocol_pdf_out)
     finally:
         doc.close()
-
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import fitz
+
+from .pdf_cache import open_pdf
+
+CropRegion = Tuple[Tuple[float, float, float, float], Path]
+JPEG_SUFFIXES = (".jpg", ".jpeg")
+JPEG_QUALITY = 85
+DEFAULT_ZOOM = 1.5
+
+
+def crop_file_name(
+    stem: str,
+    pdf_path: Path,
+    page_index: int,
+    bbox: Tuple[float, float, float, float],
+    zoom: float,
+    image_format: str,
+) -> str:
+    # Source and geometry are part of the name so a moved bbox never reuses a stale crop.
+    fingerprint = "|".join(
+        [str(Path(pdf_path).resolve()), str(page_index), *(f"{v:.2f}" for v in bbox), str(zoom)]
+    )
+    digest = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:10]
+    return f"{stem}_{digest}.{image_format}"
+
+
+def render_page_regions(
+    pdf_path: Path,
+    page_index: int,
+    regions: Sequence[CropRegion],
+    zoom: float = DEFAULT_ZOOM,
+    reuse_existing: bool = False,
+) -> List[Path]:
+    out_paths = [out_path for _, out_path in regions]
+    if reuse_existing:
+        source_mtime = Path(pdf_path).stat().st_mtime
+        regions = [
+            (bbox, out_path)
+            for bbox, out_path in regions
+            if not out_path.exists() or out_path.stat().st_mtime < source_mtime
+        ]
+    if not regions:
+        return out_paths
+    page = open_pdf(pdf_path)[page_index]
+    matrix = fitz.Matrix(zoom, zoom)
+    clip = fitz.Rect(*regions[0][0])
+    for bbox, _ in regions[1:]:
+        clip |= fitz.Rect(*bbox)
+    # Rasterize the union once and slice each crop out of it.
+    pix = page.get_pixmap(matrix=matrix, clip=clip)
+
+    for bbox, out_path in regions:
+        irect = (fitz.Rect(*bbox) * matrix).irect & pix.irect
+        crop = fitz.Pixmap(pix.colorspace, irect, pix.alpha)
+        crop.copy(pix, irect)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        if out_path.suffix.lower() in JPEG_SUFFIXES:
+            crop.save(out_path, jpg_quality=JPEG_QUALITY)
+        else:
+            crop.save(out_path)
+    return out_paths
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from bisect import bisect_right
 import re
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
@@ -7,69 +8,100 @@ from typing import Dict, List, Optional, Tuple
 import fitz
 
 from .models import ReportBlock
+from .pdf_cache import open_pdf
+from .pdf_render import DEFAULT_ZOOM, render_page_regions
 
 RE_REPEAT = re.compile(r"Repeat ID\s+(\d+)")
 RE_DIFF = re.compile(r"Difference ID:\s*(\d+)")
 
 
-def _first_rect_for_text(page: fitz.Page, needle: str) -> Tuple[float, float, float, float]:
-    rects = page.search_for(needle)
+WordSpan = Tuple[int, int, Tuple[float, float, float, float]]
+
+
+def _page_text_with_spans(page: fitz.Page) -> Tuple[str, List[WordSpan]]:
+    # Rebuild page text from words so regex matches map back to word boxes.
+    parts: List[str] = []
+    spans: List[WordSpan] = []
+    offset = 0
+    previous_line: Optional[Tuple[int, int]] = None
+    for x0, y0, x1, y1, word, block_no, line_no, _word_no in page.get_text("words"):
+        line = (block_no, line_no)
+        if parts:
+            parts.append(" " if line == previous_line else "\n")
+            offset += 1
+        previous_line = line
+        spans.append((offset, offset + len(word), (x0, y0, x1, y1)))
+        parts.append(word)
+        offset += len(word)
+    return "".join(parts), spans
+
+
+def _span_bbox(
+    spans: List[WordSpan], span_starts: List[int], start: int, end: int
+) -> Tuple[float, float, float, float]:
+    i = max(0, bisect_right(span_starts, start) - 1)
+    rects: List[Tuple[float, float, float, float]] = []
+    while i < len(spans) and spans[i][0] < end:
+        if spans[i][1] > start:
+            rects.append(spans[i][2])
+        i += 1
     if not rects:
         return (0.0, 0.0, 0.0, 0.0)
-    r = rects[0]
-    return (r.x0, r.y0, r.x1, r.y1)
+    return (
+        min(r[0] for r in rects),
+        min(r[1] for r in rects),
+        max(r[2] for r in rects),
+        max(r[3] for r in rects),
+    )
 
 
 def extract_report_blocks(report_pdf: Path) -> List[ReportBlock]:
-    doc = fitz.open(report_pdf)
-    try:
-        blocks: List[ReportBlock] = []
-        current_repeat: Optional[int] = None
-
-        for page_idx in range(len(doc)):
-            page = doc[page_idx]
-            text = page.get_text()
-
-            repeat_match = RE_REPEAT.search(text)
-            if repeat_match:
-                current_repeat = int(repeat_match.group(1))
-
-            page_diffs: List[Tuple[int, Tuple[float, float, float, float]]] = []
-            for diff_match in RE_DIFF.finditer(text):
-                difference_id = int(diff_match.group(1))
-                label = f"Difference ID: {difference_id}"
-                bbox = _first_rect_for_text(page, label)
-                page_diffs.append((difference_id, bbox))
-
-            page_diffs.sort(key=lambda item: item[1][1])
-            for i, (difference_id, bbox) in enumerate(page_diffs):
-                top = max(0.0, bbox[1] + 22.0)
-                next_top = (
-                    page_diffs[i + 1][1][1]
-                    if (i + 1) < len(page_diffs)
-                    else page.rect.height - 5.0
-                )
-                bottom = max(top + 10.0, next_top - 8.0)
-                mid_x = page.rect.width / 2.0
-                left_margin = 8.0
-                right_margin = page.rect.width - 8.0
-                master_bbox = (left_margin, top, mid_x - 6.0, bottom)
-                sample_bbox = (mid_x + 6.0, top, right_margin, bottom)
-
-                blocks.append(
-                    ReportBlock(
-                        repeat_id=current_repeat or 1,
-                        difference_id=difference_id,
-                        page_index=page_idx,
-                        block_bbox=bbox,
-                        master_bbox=master_bbox,
-                        sample_bbox=sample_bbox,
-                    )
+    doc = open_pdf(report_pdf)
+    blocks: List[ReportBlock] = []
+    current_repeat: Optional[int] = None
+
+    for page_idx in range(len(doc)):
+        page = doc[page_idx]
+        text, spans = _page_text_with_spans(page)
+        span_starts = [span[0] for span in spans]
+
+        repeat_match = RE_REPEAT.search(text)
+        if repeat_match:
+            current_repeat = int(repeat_match.group(1))
+
+        page_diffs: List[Tuple[int, Tuple[float, float, float, float]]] = []
+        for diff_match in RE_DIFF.finditer(text):
+            difference_id = int(diff_match.group(1))
+            bbox = _span_bbox(spans, span_starts, diff_match.start(), diff_match.end())
+            page_diffs.append((difference_id, bbox))
+
+        page_diffs.sort(key=lambda item: item[1][1])
+        for i, (difference_id, bbox) in enumerate(page_diffs):
+            top = max(0.0, bbox[1] + 22.0)
+            next_top = (
+                page_diffs[i + 1][1][1]
+                if (i + 1) < len(page_diffs)
+                else page.rect.height - 5.0
+            )
+            bottom = max(top + 10.0, next_top - 8.0)
+            mid_x = page.rect.width / 2.0
+            left_margin = 8.0
+            right_margin = page.rect.width - 8.0
+            master_bbox = (left_margin, top, mid_x - 6.0, bottom)
+            sample_bbox = (mid_x + 6.0, top, right_margin, bottom)
+
+            blocks.append(
+                ReportBlock(
+                    repeat_id=current_repeat or 1,
+                    difference_id=difference_id,
+                    page_index=page_idx,
+                    block_bbox=bbox,
+                    master_bbox=master_bbox,
+                    sample_bbox=sample_bbox,
                 )
+            )
 
-        return blocks
-    finally:
-        doc.close()
+    return blocks
 
 
 def build_report_lookup(blocks: List[ReportBlock]) -> Dict[Tuple[int, int], ReportBlock]:
@@ -81,16 +113,7 @@ def render_report_crop(
     page_index: int,
     bbox: Tuple[float, float, float, float],
     out_path: Path,
-    zoom: float = 2.0,
+    zoom: float = DEFAULT_ZOOM,
 ) -> Path:
-    doc = fitz.open(report_pdf)
-    try:
-        page = doc[page_index]
-        rect = fitz.Rect(*bbox)
-        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=rect)
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        pix.save(out_path)
-        return out_path
-    finally:
-        doc.close()
+    return render_page_regions(report_pdf, page_index, [(bbox, out_path)], zoom=zoom)[0]
 
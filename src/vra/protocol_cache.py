@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from dataclasses import asdict
+import hashlib
+import json
+import os
+from pathlib import Path
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from .models import ProtocolRow
+from .pdf_protocol import extract_protocol_rows
+
+PROTOCOL_CACHE_VERSION = "v1"
+
+
+def _cache_enabled() -> bool:
+    return os.getenv("VRA_PROTOCOL_CACHE_DISABLE", "").strip().lower() not in {
+        "1",
+        "true",
+        "yes",
+    }
+
+
+def _cache_dir() -> Path:
+    cache_default = Path(".cache") / "protocol_rows"
+    return Path(os.getenv("VRA_PROTOCOL_CACHE_DIR", str(cache_default)))
+
+
+def _cache_key(protocol_pdf: Path, test_id: str) -> str:
+    stat = protocol_pdf.stat()
+    fingerprint = "|".join(
+        [
+            PROTOCOL_CACHE_VERSION,
+            str(protocol_pdf.resolve()),
+            str(stat.st_mtime_ns),
+            str(stat.st_size),
+            test_id,
+        ]
+    )
+    return hashlib.md5(fingerprint.encode("utf-8")).hexdigest()
+
+
+def _row_from_dict(item: Dict[str, Any]) -> ProtocolRow:
+    for bbox_field in ("master_bbox", "sample_bbox"):
+        if item.get(bbox_field) is not None:
+            item[bbox_field] = tuple(item[bbox_field])
+    return ProtocolRow(**item)
+
+
+def _load(cache_path: Path) -> Optional[List[ProtocolRow]]:
+    if not cache_path.exists():
+        return None
+    try:
+        payload = json.loads(cache_path.read_text(encoding="utf-8"))
+        if not isinstance(payload, list):
+            return None
+        return [_row_from_dict(item) for item in payload]
+    except (OSError, json.JSONDecodeError, TypeError, AttributeError):
+        return None
+
+
+def _save(cache_path: Path, rows: List[ProtocolRow]) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump([asdict(row) for row in rows], handle)
+        os.replace(tmp_name, cache_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def extract_protocol_rows_cached(protocol_pdf: Path, test_id: str) -> List[ProtocolRow]:
+    if not _cache_enabled():
+        return extract_protocol_rows(protocol_pdf, test_id=test_id)
+
+    cache_path = _cache_dir() / f"{_cache_key(protocol_pdf, test_id)}.json"
+    rows = _load(cache_path)
+    if rows is not None:
+        return rows
+
+    rows = extract_protocol_rows(protocol_pdf, test_id=test_id)
+    try:
+        _save(cache_path, rows)
+    except OSError:
+        pass
+    return rows
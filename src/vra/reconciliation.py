@@ -1,17 +1,207 @@
 from __future__ import annotations
 
+from collections import Counter
 import csv
+import os
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Set, Tuple
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
 
-from .models import Decision, ReconciliationRow
-from .pdf_protocol import apply_pass_fail_value, extract_protocol_rows, render_protocol_crop
-from .pdf_report import build_report_lookup, extract_report_blocks, render_report_crop
+from .models import ComparisonResult, Decision, ProtocolRow, ReconciliationRow, ReportBlock
+from .pdf_cache import close_all
+from .pdf_protocol import apply_pass_fail_value
+from .pdf_render import (
+    DEFAULT_ZOOM,
+    JPEG_SUFFIXES,
+    CropRegion,
+    crop_file_name,
+    render_page_regions,
+)
+from .pdf_report import build_report_lookup, extract_report_blocks
+from .protocol_cache import extract_protocol_rows_cached
 from .vlm import VLMClient
 
 EXPECTED_REPEATS = range(1, 5)
 EXPECTED_DIFFERENCE_IDS = range(1, 20)
 
+EvidenceCrops = Tuple[Optional[Path], Optional[Path], Optional[Path], Optional[Path]]
+RenderJobs = Dict[Tuple[Path, int], List[CropRegion]]
+PendingComparison = Tuple[Tuple[int, int], Optional[ProtocolRow], ReportBlock, EvidenceCrops]
+
+
+def _missing_report_row(
+    repeat_id: int,
+    difference_id: int,
+    protocol_row: Optional[ProtocolRow],
+    repeat_has_differences: bool,
+) -> Tuple[ReconciliationRow, str]:
+    if not repeat_has_differences:
+        row = ReconciliationRow(
+            repeat_id=repeat_id,
+            difference_id=difference_id,
+            decision=Decision.PASS,
+            match=True,
+            confidence=1.0,
+            reason="Auto-pass: report shows zero differences for this repeat.",
+            evidence=["repeat_zero_differences"],
+            protocol_page_index=protocol_row.page_index if protocol_row else None,
+            protocol_widget_name=protocol_row.radio_group_name if protocol_row else None,
+            report_page_index=None,
+        )
+        return row, (
+            f"repeat {repeat_id} diff {difference_id}: "
+            "auto-pass (repeat has zero differences)"
+        )
+
+    evidence = ["missing_difference_id"]
+    if protocol_row is None:
+        evidence.append("missing_protocol_widget")
+    row = ReconciliationRow(
+        repeat_id=repeat_id,
+        difference_id=difference_id,
+        decision=Decision.FAIL,
+        match=False,
+        confidence=1.0,
+        reason="Missing difference in report for active repeat.",
+        evidence=evidence,
+        protocol_page_index=protocol_row.page_index if protocol_row else None,
+        protocol_widget_name=protocol_row.radio_group_name if protocol_row else None,
+        report_page_index=None,
+    )
+    return row, f"repeat {repeat_id} diff {difference_id}: missing report difference"
+
+
+def _plan_crop(
+    render_jobs: RenderJobs,
+    pdf_path: Path,
+    page_index: int,
+    bbox: Optional[Tuple[float, float, float, float]],
+    evidence_dir: Path,
+    stem: str,
+    image_format: str,
+    zoom: float,
+) -> Optional[Path]:
+    if not bbox:
+        return None
+    out_path = evidence_dir / crop_file_name(stem, pdf_path, page_index, bbox, zoom, image_format)
+    render_jobs.setdefault((pdf_path, page_index), []).append((bbox, out_path))
+    return out_path
+
+
+def _prune_stale_crops(evidence_root: Path, render_jobs: RenderJobs) -> None:
+    # Crop names carry a geometry/zoom/format fingerprint, so crops from a run with
+    # other settings would otherwise sit next to the current ones indefinitely.
+    planned = {out_path for regions in render_jobs.values() for _, out_path in regions}
+    for path in evidence_root.glob("r*_d*/*"):
+        if path.suffix.lower() in (".png", *JPEG_SUFFIXES) and path not in planned:
+            path.unlink()
+
+
+def _plan_evidence(
+    render_jobs: RenderJobs,
+    protocol_pdf: Path,
+    report_pdf: Path,
+    protocol_row: Optional[ProtocolRow],
+    report_block: ReportBlock,
+    evidence_dir: Path,
+    image_format: str,
+    zoom: float,
+) -> EvidenceCrops:
+    pq_master = (
+        _plan_crop(
+            render_jobs,
+            protocol_pdf,
+            protocol_row.page_index,
+            protocol_row.master_bbox,
+            evidence_dir,
+            "pq_master",
+            image_format,
+            zoom,
+        )
+        if protocol_row
+        else None
+    )
+    pq_sample = (
+        _plan_crop(
+            render_jobs,
+            protocol_pdf,
+            protocol_row.page_index,
+            protocol_row.sample_bbox,
+            evidence_dir,
+            "pq_sample",
+            image_format,
+            zoom,
+        )
+        if protocol_row
+        else None
+    )
+    report_master = _plan_crop(
+        render_jobs,
+        report_pdf,
+        report_block.page_index,
+        report_block.master_bbox,
+        evidence_dir,
+        "report_master",
+        image_format,
+        zoom,
+    )
+    report_sample = _plan_crop(
+        render_jobs,
+        report_pdf,
+        report_block.page_index,
+        report_block.sample_bbox,
+        evidence_dir,
+        "report_sample",
+        image_format,
+        zoom,
+    )
+    return pq_master, pq_sample, report_master, report_sample
+
+
+def _comparison_row(
+    repeat_id: int,
+    difference_id: int,
+    protocol_row: Optional[ProtocolRow],
+    report_block: ReportBlock,
+    crops: EvidenceCrops,
+    comparison: ComparisonResult,
+    threshold: float,
+) -> ReconciliationRow:
+    effective_confidence = (
+        comparison.confidence if comparison.confidence is not None else 1.0
+    )
+    if protocol_row is None:
+        decision = Decision.UNSET
+        reason = (
+            "Protocol row mapping missing for this repeat/difference; "
+            "manual review required."
+        )
+    elif comparison.match and effective_confidence >= threshold:
+        decision = Decision.PASS
+        reason = comparison.reason
+    elif effective_confidence >= threshold:
+        decision = Decision.FAIL
+        reason = comparison.reason
+    else:
+        decision = Decision.UNSET
+        reason = comparison.reason
+
+    evidence = [comparison.source]
+    evidence.extend(str(path) for path in crops if path)
+    if protocol_row is None:
+        evidence.append("missing_protocol_widget")
+    return ReconciliationRow(
+        repeat_id=repeat_id,
+        difference_id=difference_id,
+        decision=decision,
+        match=comparison.match,
+        confidence=comparison.confidence,
+        reason=reason,
+        evidence=evidence,
+        protocol_page_index=protocol_row.page_index if protocol_row else None,
+        protocol_widget_name=protocol_row.radio_group_name if protocol_row else None,
+        report_page_index=report_block.page_index,
+    )
+
 
 def run_reconciliation(
     protocol_pdf: Path,
@@ -21,270 +211,174 @@ def run_reconciliation(
     output_dir: Path,
     progress_callback: Optional[Callable[[int, int, str], None]] = None,
 ) -> Tuple[Path, Path, Path, List[ReconciliationRow]]:
-    protocol_rows = extract_protocol_rows(protocol_pdf, test_id=test_id)
-    report_blocks = extract_report_blocks(report_pdf)
-    report_lookup = build_report_lookup(report_blocks)
-    repeat_counts: Dict[int, int] = {}
-    for block in report_blocks:
-        repeat_counts[block.repeat_id] = repeat_counts.get(block.repeat_id, 0) + 1
-
     vlm = VLMClient()
-    rows: List[ReconciliationRow] = []
-    protocol_lookup = {(r.repeat_id, r.difference_id): r for r in protocol_rows}
-    expected_keys: Set[Tuple[int, int]] = {
-        (repeat_id, difference_id)
-        for repeat_id in EXPECTED_REPEATS
-        for difference_id in EXPECTED_DIFFERENCE_IDS
-    }
-
-    for repeat_id in EXPECTED_REPEATS:
-        for difference_id in EXPECTED_DIFFERENCE_IDS:
-            key = (repeat_id, difference_id)
+    try:
+        protocol_rows = extract_protocol_rows_cached(protocol_pdf, test_id=test_id)
+        report_blocks = extract_report_blocks(report_pdf)
+        report_lookup = build_report_lookup(report_blocks)
+        repeat_counts = Counter(block.repeat_id for block in report_blocks)
+
+        protocol_lookup = {(r.repeat_id, r.difference_id): r for r in protocol_rows}
+        keys: List[Tuple[int, int]] = [
+            (repeat_id, difference_id)
+            for repeat_id in EXPECTED_REPEATS
+            for difference_id in EXPECTED_DIFFERENCE_IDS
+        ]
+        expected_keys: FrozenSet[Tuple[int, int]] = frozenset(keys)
+        total_keys = len(keys)
+
+        image_format = os.getenv("VRA_EVIDENCE_FORMAT", "png").strip().lower() or "png"
+        if image_format not in ("png", "jpg", "jpeg"):
+            raise ValueError(
+                f"Unsupported VRA_EVIDENCE_FORMAT '{image_format}'. Use png or jpg."
+            )
+        zoom = float(os.getenv("VRA_CROP_ZOOM", str(DEFAULT_ZOOM)))
+        if zoom <= 0:
+            raise ValueError(f"VRA_CROP_ZOOM must be positive, got {zoom}.")
+        results: Dict[Tuple[int, int], ReconciliationRow] = {}
+        pending: List[PendingComparison] = []
+        render_jobs: RenderJobs = {}
+        for key in keys:
+            repeat_id, difference_id = key
             protocol_row = protocol_lookup.get(key)
             report_block = report_lookup.get(key)
 
             if report_block is None:
-                if repeat_counts.get(repeat_id, 0) == 0:
-                    rows.append(
-                        ReconciliationRow(
-                            repeat_id=repeat_id,
-                            difference_id=difference_id,
-                            decision=Decision.PASS,
-                            match=True,
-                            confidence=1.0,
-                            reason=(
-                                "Auto-pass: report shows zero differences for this repeat."
-                            ),
-                            evidence=["repeat_zero_differences"],
-                            protocol_page_index=(
-                                protocol_row.page_index if protocol_row else None
-                            ),
-                            protocol_widget_name=(
-                                protocol_row.radio_group_name if protocol_row else None
-                            ),
-                            report_page_index=None,
-                        )
-                    )
-                    if progress_callback:
-                        progress_callback(
-                            len(rows),
-                            len(expected_keys),
-                            (
-                                f"repeat {repeat_id} diff {difference_id}: "
-                                "auto-pass (repeat has zero differences)"
-                            ),
-                        )
-                else:
-                    evidence = ["missing_difference_id"]
-                    if protocol_row is None:
-                        evidence.append("missing_protocol_widget")
-                    rows.append(
-                        ReconciliationRow(
-                            repeat_id=repeat_id,
-                            difference_id=difference_id,
-                            decision=Decision.FAIL,
-                            match=False,
-                            confidence=1.0,
-                            reason="Missing difference in report for active repeat.",
-                            evidence=evidence,
-                            protocol_page_index=(
-                                protocol_row.page_index if protocol_row else None
-                            ),
-                            protocol_widget_name=(
-                                protocol_row.radio_group_name if protocol_row else None
-                            ),
-                            report_page_index=None,
-                        )
-                    )
-                    if progress_callback:
-                        progress_callback(
-                            len(rows),
-                            len(expected_keys),
-                            (
-                                f"repeat {repeat_id} diff {difference_id}: "
-                                "missing report difference"
-                            ),
-                        )
+                row, message = _missing_report_row(
+                    repeat_id,
+                    difference_id,
+                    protocol_row,
+                    repeat_has_differences=repeat_counts[repeat_id] > 0,
+                )
+                results[key] = row
+                if progress_callback:
+                    progress_callback(len(results), total_keys, message)
                 continue
 
-            evidence_dir = output_dir / "evidence" / f"r{repeat_id}_d{difference_id}"
-            pq_master = (
-                render_protocol_crop(
-                    protocol_pdf=protocol_pdf,
-                    page_index=protocol_row.page_index,
-                    bbox=protocol_row.master_bbox,
-                    out_path=evidence_dir / "pq_master.png",
-                )
-                if protocol_row and protocol_row.master_bbox
-                else None
-            )
-            pq_sample = (
-                render_protocol_crop(
-                    protocol_pdf=protocol_pdf,
-                    page_index=protocol_row.page_index,
-                    bbox=protocol_row.sample_bbox,
-                    out_path=evidence_dir / "pq_sample.png",
-                )
-                if protocol_row and protocol_row.sample_bbox
-                else None
-            )
-            report_master = (
-                render_report_crop(
-                    report_pdf=report_pdf,
-                    page_index=report_block.page_index,
-                    bbox=report_block.master_bbox,
-                    out_path=evidence_dir / "report_master.png",
-                )
-                if report_block.master_bbox
-                else None
-            )
-            report_sample = (
-                render_report_crop(
-                    report_pdf=report_pdf,
-                    page_index=report_block.page_index,
-                    bbox=report_block.sample_bbox,
-                    out_path=evidence_dir / "report_sample.png",
-                )
-                if report_block.sample_bbox
-                else None
+            crops = _plan_evidence(
+                render_jobs,
+                protocol_pdf,
+                report_pdf,
+                protocol_row,
+                report_block,
+                output_dir / "evidence" / f"r{repeat_id}_d{difference_id}",
+                image_format,
+                zoom,
             )
+            pending.append((key, protocol_row, report_block, crops))
 
-            comparison = vlm.compare(
-                pq_master=pq_master,
-                pq_sample=pq_sample,
-                report_master=report_master,
-                report_sample=report_sample,
-            )
-            effective_confidence = (
-                comparison.confidence if comparison.confidence is not None else 1.0
+        _prune_stale_crops(output_dir / "evidence", render_jobs)
+
+        # One rasterization per page, skipping crops already on disk from a
+        # previous run. PyMuPDF documents are not thread-safe, so rendering
+        # finishes here before the VLM comparisons fan out.
+        for (pdf_path, page_index), regions in render_jobs.items():
+            render_page_regions(pdf_path, page_index, regions, zoom=zoom, reuse_existing=True)
+
+        def record_comparison(index: int, comparison: ComparisonResult) -> None:
+            key, protocol_row, report_block, crops = pending[index]
+            repeat_id, difference_id = key
+            row = _comparison_row(
+                repeat_id,
+                difference_id,
+                protocol_row,
+                report_block,
+                crops,
+                comparison,
+                threshold,
             )
-            if protocol_row is None:
-                decision = Decision.UNSET
-                reason = (
-                    "Protocol row mapping missing for this repeat/difference; "
-                    "manual review required."
+            results[key] = row
+            if progress_callback:
+                progress_callback(
+                    len(results),
+                    total_keys,
+                    f"repeat {repeat_id} diff {difference_id}: {row.decision.value}",
                 )
-            elif comparison.match and effective_confidence >= threshold:
-                decision = Decision.PASS
-                reason = comparison.reason
-            elif effective_confidence >= threshold:
-                decision = Decision.FAIL
-                reason = comparison.reason
-            else:
-                decision = Decision.UNSET
-                reason = comparison.reason
-
-            evidence = ["vlm_compare"]
-            evidence.extend(
-                str(path)
-                for path in (pq_master, pq_sample, report_master, report_sample)
-                if path
-            )
-            if protocol_row is None:
-                evidence.append("missing_protocol_widget")
+
+        vlm.compare_batch([item[3] for item in pending], on_result=record_comparison)
+
+        rows: List[ReconciliationRow] = [results[key] for key in keys]
+
+        for repeat_id, difference_id in sorted(report_lookup.keys()):
+            if (repeat_id, difference_id) in expected_keys:
+                continue
+            report_block = report_lookup[(repeat_id, difference_id)]
             rows.append(
                 ReconciliationRow(
                     repeat_id=repeat_id,
                     difference_id=difference_id,
-                    decision=decision,
-                    match=comparison.match,
-                    confidence=comparison.confidence,
-                    reason=reason,
-                    evidence=evidence,
-                    protocol_page_index=(
-                        protocol_row.page_index if protocol_row else None
-                    ),
-                    protocol_widget_name=(
-                        protocol_row.radio_group_name if protocol_row else None
-                    ),
+                    decision=Decision.UNSET,
+                    match=False,
+                    confidence=1.0,
+                    reason="Informational: extra difference ID found in report.",
+                    evidence=["extra_difference_id"],
+                    protocol_page_index=None,
+                    protocol_widget_name=None,
                     report_page_index=report_block.page_index,
                 )
             )
-            if progress_callback:
-                progress_callback(
-                    len(rows),
-                    len(expected_keys),
-                    (
-                        f"repeat {repeat_id} diff {difference_id}: "
-                        f"{rows[-1].decision.value}"
-                    ),
-                )
-
-    for repeat_id, difference_id in sorted(report_lookup.keys()):
-        if (repeat_id, difference_id) in expected_keys:
-            continue
-        report_block = report_lookup[(repeat_id, difference_id)]
-        rows.append(
-            ReconciliationRow(
-                repeat_id=repeat_id,
-                difference_id=difference_id,
-                decision=Decision.UNSET,
-                match=False,
-                confidence=1.0,
-                reason="Informational: extra difference ID found in report.",
-                evidence=["extra_difference_id"],
-                protocol_page_index=None,
-                protocol_widget_name=None,
-                report_page_index=report_block.page_index,
-            )
-        )
 
-    output_dir.mkdir(parents=True, exist_ok=True)
-    out_pdf = output_dir / "protocol_reconciled.pdf"
-    out_csv = output_dir / "reconciliation_log.csv"
-    out_exceptions = output_dir / "exceptions.csv"
-
-    decisions: Dict[Tuple[int, int], str] = {}
-    for row in rows:
-        if row.decision in (Decision.PASS, Decision.FAIL):
-            decisions[(row.repeat_id, row.difference_id)] = row.decision.value
-    apply_pass_fail_value(
-        protocol_pdf_in=protocol_pdf,
-        protocol_pdf_out=out_pdf,
-        decisions=decisions,
-        test_id=test_id,
-    )
+        output_dir.mkdir(parents=True, exist_ok=True)
+        out_pdf = output_dir / "protocol_reconciled.pdf"
+        out_csv = output_dir / "reconciliation_log.csv"
+        out_exceptions = output_dir / "exceptions.csv"
 
-    with out_csv.open("w", newline="", encoding="utf-8") as csv_file:
-        writer = csv.writer(csv_file)
-        writer.writerow(
-            [
-                "repeat_id",
-                "difference_id",
-                "status",
-                "match",
-                "confidence",
-                "reason",
-                "evidence",
-                "protocol_page",
-                "protocol_widget",
-                "report_page",
-            ]
-        )
+        decisions: Dict[Tuple[int, int], str] = {}
         for row in rows:
-            writer.writerow(
+            if row.decision in (Decision.PASS, Decision.FAIL):
+                decisions[(row.repeat_id, row.difference_id)] = row.decision.value
+        apply_pass_fail_value(
+            protocol_pdf_in=protocol_pdf,
+            protocol_pdf_out=out_pdf,
+            decisions=decisions,
+            test_id=test_id,
+            protocol_rows=protocol_rows,
+        )
+
+        with out_csv.open("w", newline="", encoding="utf-8") as log_file, out_exceptions.open(
+            "w", newline="", encoding="utf-8"
+        ) as exceptions_file:
+            log_writer = csv.writer(log_file)
+            exceptions_writer = csv.writer(exceptions_file)
+            log_writer.writerow(
                 [
-                    row.repeat_id,
-                    row.difference_id,
-                    row.decision.value,
-                    row.match,
-                    row.confidence,
-                    row.reason,
-                    ";".join(row.evidence),
-                    row.protocol_page_index,
-                    row.protocol_widget_name,
-                    row.report_page_index,
+                    "repeat_id",
+                    "difference_id",
+                    "status",
+                    "match",
+                    "confidence",
+                    "reason",
+                    "evidence",
+                    "protocol_page",
+                    "protocol_widget",
+                    "report_page",
                 ]
             )
-
-    with out_exceptions.open("w", newline="", encoding="utf-8") as csv_file:
-        writer = csv.writer(csv_file)
-        writer.writerow(["repeat_id", "difference_id", "status", "reason"])
-        for row in rows:
-            if row.decision != Decision.PASS:
-                writer.writerow(
-                    [row.repeat_id, row.difference_id, row.decision.value, row.reason]
+            exceptions_writer.writerow(["repeat_id", "difference_id", "status", "reason"])
+            passed = Decision.PASS
+            for row in rows:
+                status = row.decision.value
+                log_writer.writerow(
+                    [
+                        row.repeat_id,
+                        row.difference_id,
+                        status,
+                        row.match,
+                        row.confidence,
+                        row.reason,
+                        ";".join(row.evidence),
+                        row.protocol_page_index,
+                        row.protocol_widget_name,
+                        row.report_page_index,
+                    ]
                 )
+                if row.decision != passed:
+                    exceptions_writer.writerow(
+                        [row.repeat_id, row.difference_id, status, row.reason]
+                    )
 
-    return out_pdf, out_csv, out_exceptions, rows
+        return out_pdf, out_csv, out_exceptions, rows
+    finally:
+        vlm.close()
+        close_all()
 
@@ -1,23 +1,131 @@
 from __future__ import annotations
 
 import base64
+from collections import OrderedDict
+import gzip
 import ast
+import atexit
 import hashlib
+import http.client
 import json
+import mmap
 import os
 from pathlib import Path
 import re
-from typing import Any, Dict, Optional
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 import time
+import zlib
 from urllib import error, parse, request
 
+import fitz
+
 from .models import ComparisonResult
+from .pdf_render import JPEG_QUALITY, JPEG_SUFFIXES
+
+try:
+    import orjson
+except ImportError:  # optional speedup, see the "fast" extra
+    orjson = None
+
+VLM_CACHE_VERSION = "v4"
+GEMINI_HOST = "generativelanguage.googleapis.com"
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+_FENCE_RE = re.compile(r"```[^\n]*\n(.*)\n[ \t]*```[ \t]*", re.DOTALL)
+_MATCH_RE = re.compile(r'["\']?match["\']?\s*:\s*(true|false)', re.IGNORECASE)
+_CONFIDENCE_RE = re.compile(
+    r'["\']?confidence["\']?\s*:\s*([0-9]*\.?[0-9]+)', re.IGNORECASE
+)
+_REASON_RE = re.compile(r'["\']?reason["\']?\s*:\s*["\']([^"\']*)', re.IGNORECASE)
+
+# pq_master, pq_sample, report_master, report_sample
+CompareTask = Tuple[Optional[Path], Optional[Path], Optional[Path], Optional[Path]]
+
+
+def _json_dumps(obj: Any, pretty: bool = False) -> bytes:
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if pretty else 0
+        return orjson.dumps(obj, option=option)
+    if pretty:
+        return json.dumps(obj, indent=2).encode("utf-8")
+    return json.dumps(obj).encode("utf-8")
+
+
+def _json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# PyMuPDF is not thread-safe and compare() runs on worker threads.
+_FITZ_LOCK = threading.Lock()
+
+
+def _prepare_image(path: Path, max_edge: int) -> bytes:
+    """Return the image bytes to send, downscaled if its long edge exceeds max_edge."""
+    data = path.read_bytes()
+    if max_edge <= 0:
+        return data
+    with _FITZ_LOCK:
+        pix = fitz.Pixmap(data)
+        long_edge = max(pix.width, pix.height)
+        if long_edge <= max_edge:
+            return data
+        scale = max_edge / long_edge
+        pix = fitz.Pixmap(
+            pix, max(1, round(pix.width * scale)), max(1, round(pix.height * scale))
+        )
+        # Keep the source format: PNG stays lossless for text-heavy crops.
+        if path.suffix.lower() in JPEG_SUFFIXES:
+            if pix.alpha:
+                pix = fitz.Pixmap(pix, 0)
+            return pix.tobytes("jpeg", jpg_quality=JPEG_QUALITY)
+        return pix.tobytes("png")
+
+
+def _stat_key(path: Path) -> Tuple[str, int, int]:
+    stat = path.stat()
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _sha256_file(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with path.open("rb") as handle:
+        # mmap lets sha256 read the page cache directly; empty files can't be mapped.
+        if os.fstat(handle.fileno()).st_size:
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                hasher.update(mapped)
+    return hasher.hexdigest()
+
 
-VLM_CACHE_VERSION = "v2"
+def _image_mime_type(path: Path) -> str:
+    if path.suffix.lower() in JPEG_SUFFIXES:
+        return "image/jpeg"
+    return "image/png"
 
 
-def _encode_image(path: Path) -> str:
-    return base64.b64encode(path.read_bytes()).decode("ascii")
+def _open_connection(timeout_seconds: float) -> http.client.HTTPSConnection:
+    # Mirror urllib's proxy handling so keep-alive connections still honor HTTPS_PROXY.
+    proxy = request.getproxies().get("https")
+    if not proxy or request.proxy_bypass(GEMINI_HOST):
+        return http.client.HTTPSConnection(GEMINI_HOST, timeout=timeout_seconds)
+    proxy_url = parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+    connection = http.client.HTTPSConnection(
+        proxy_url.hostname or "", proxy_url.port or 80, timeout=timeout_seconds
+    )
+    tunnel_headers: Dict[str, str] = {}
+    if proxy_url.username:
+        credentials = (
+            f"{parse.unquote(proxy_url.username)}:{parse.unquote(proxy_url.password or '')}"
+        )
+        tunnel_headers["Proxy-Authorization"] = "Basic " + base64.b64encode(
+            credentials.encode("utf-8")
+        ).decode("ascii")
+    connection.set_tunnel(GEMINI_HOST, 443, headers=tunnel_headers)
+    return connection
 
 
 def _extract_response_text(payload: Dict[str, Any]) -> str:
@@ -49,17 +157,16 @@ def _extract_candidate_obj(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
 
 def _strip_json_fence(text: str) -> str:
     stripped = text.strip()
-    if stripped.startswith("```"):
-        lines = stripped.splitlines()
-        if len(lines) >= 3 and lines[-1].strip() == "```":
-            return "\n".join(lines[1:-1]).strip()
+    fenced = _FENCE_RE.fullmatch(stripped)
+    if fenced:
+        return fenced.group(1).strip()
     return stripped
 
 
-def _parse_model_json(text: str) -> Dict[str, Any]:
+def _parse_loose_json(text: str) -> Any:
     cleaned = _strip_json_fence(text)
     try:
-        parsed = json.loads(cleaned)
+        return json.loads(cleaned)
     except json.JSONDecodeError as first_exc:
         parsed = None
         start = cleaned.find("{")
@@ -80,28 +187,27 @@ def _parse_model_json(text: str) -> Dict[str, Any]:
                 parsed = None
         if parsed is None:
             partial: Dict[str, Any] = {}
-            match_match = re.search(
-                r'["\']?match["\']?\s*:\s*(true|false)', cleaned, re.IGNORECASE
-            )
+            match_match = _MATCH_RE.search(cleaned)
             if match_match:
                 partial["match"] = match_match.group(1).lower() == "true"
-            confidence_match = re.search(
-                r'["\']?confidence["\']?\s*:\s*([0-9]*\.?[0-9]+)',
-                cleaned,
-                re.IGNORECASE,
-            )
+            confidence_match = _CONFIDENCE_RE.search(cleaned)
             if confidence_match:
                 partial["confidence"] = float(confidence_match.group(1))
-            reason_match = re.search(
-                r'["\']?reason["\']?\s*:\s*["\']([^"\']*)',
-                cleaned,
-                re.IGNORECASE,
-            )
+            reason_match = _REASON_RE.search(cleaned)
             if reason_match:
                 partial["reason"] = reason_match.group(1)
             if "match" in partial:
                 return partial
             raise first_exc
+        return parsed
+
+
+def _parse_model_json(text: str) -> Dict[str, Any]:
+    try:
+        # Strict JSON is the common case; only clean up the text when it isn't.
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        parsed = _parse_loose_json(text)
     if isinstance(parsed, list) and parsed and isinstance(parsed[0], dict):
         parsed = parsed[0]
     if not isinstance(parsed, dict):
@@ -152,11 +258,22 @@ class VLMClient:
         self.model_name = env_model or model_name
         self.api_key = (api_key or os.getenv("GEMINI_API_KEY", "")).strip()
         self.timeout_seconds = timeout_seconds
+        # Request paths are fixed for the client's lifetime; build them once.
+        key_query = parse.urlencode({"key": self.api_key})
+        self._generate_path = f"/v1beta/models/{self.model_name}:generateContent?{key_query}"
+        self._upload_path = f"/upload/v1beta/files?{key_query}"
         self.min_seconds_between_calls = float(
             os.getenv("GEMINI_MIN_SECONDS_BETWEEN_CALLS", "0.5")
         )
         self.max_retries = int(os.getenv("GEMINI_MAX_RETRIES", "2"))
-        self._last_request_at = 0.0
+        self.max_concurrency = max(1, int(os.getenv("VRA_CONCURRENCY", "12")))
+        # Next free request slot on the monotonic clock, shared by all worker threads.
+        self._next_slot = 0.0
+        # compare() may be called from worker threads; guards throttle and cache state.
+        self._lock = threading.Lock()
+        # One keep-alive HTTPS connection per calling thread.
+        self._local = threading.local()
+        self._connections: List[http.client.HTTPSConnection] = []
         cache_default = Path(".cache") / "vlm_cache.json"
         self.cache_path = Path(os.getenv("VLM_CACHE_PATH", str(cache_default)))
         self.cache_enabled = os.getenv("VLM_CACHE_DISABLE", "").strip().lower() not in {
@@ -164,30 +281,126 @@ class VLMClient:
             "true",
             "yes",
         }
-        self._cache: Dict[str, Dict[str, Any]] = self._load_cache()
+        # New results are appended to an NDJSON log next to the snapshot; the log is
+        # folded back into the snapshot every VLM_CACHE_COMPACT_ENTRIES and on close/exit.
+        # With VLM_CACHE_WRITEBACK they are only kept in memory until close/exit.
+        self.cache_log_path = self.cache_path.with_suffix(".ndjson")
+        # A VLM_CACHE_PATH ending in .gz stores the snapshot gzip-compressed.
+        self._cache_compressed = self.cache_path.suffix.lower() == ".gz"
+        self.cache_compact_entries = int(os.getenv("VLM_CACHE_COMPACT_ENTRIES", "500"))
+        self.cache_writeback = os.getenv("VLM_CACHE_WRITEBACK", "").strip().lower() in {
+            "1",
+            "true",
+            "yes",
+        }
+        self._unsaved_entries = 0
+        # Least recently used entries are evicted past VLM_CACHE_MAX_ENTRIES; the
+        # snapshot is written in recency order so that survives across runs.
+        self.cache_max_entries = max(1, int(os.getenv("VLM_CACHE_MAX_ENTRIES", "100000")))
+        self._cache: OrderedDict[str, Dict[str, Any]] = self._load_cache()
+        atexit.register(self.flush_cache)
+        # Per-image sha256 keyed by (path, mtime_ns, size); base64 payloads and Files API
+        # URIs keyed by that digest, so identical files under different paths share them.
+        self._digest_cache: Dict[Tuple[str, int, int], str] = {}
+        self._encoded_cache: Dict[str, str] = {}
+        self._file_uri_cache: Dict[str, str] = {}
+        # Images whose long edge exceeds this are downscaled before sending; 0 disables.
+        self.image_max_edge = int(os.getenv("GEMINI_IMAGE_MAX_EDGE", "1024"))
+        self.file_upload_min_bytes = int(
+            os.getenv("GEMINI_FILE_UPLOAD_MIN_BYTES", str(1024 * 1024))
+        )
 
-    def _load_cache(self) -> Dict[str, Dict[str, Any]]:
-        if not self.cache_enabled or not self.cache_path.exists():
-            return {}
-        try:
-            payload = json.loads(self.cache_path.read_text(encoding="utf-8"))
-            if isinstance(payload, dict):
-                return {
-                    key: value
-                    for key, value in payload.items()
-                    if isinstance(key, str) and isinstance(value, dict)
-                }
-        except (OSError, json.JSONDecodeError):
-            return {}
-        return {}
+    def _load_cache(self) -> OrderedDict[str, Dict[str, Any]]:
+        cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        if not self.cache_enabled:
+            return cache
+        if self.cache_path.exists():
+            try:
+                raw = self.cache_path.read_bytes()
+                if self._cache_compressed:
+                    raw = gzip.decompress(raw)
+                payload = _json_loads(raw)
+                if isinstance(payload, dict):
+                    cache.update(
+                        (key, value)
+                        for key, value in payload.items()
+                        if isinstance(key, str) and isinstance(value, dict)
+                    )
+            except (OSError, EOFError, ValueError, zlib.error):
+                pass
+        if self.cache_log_path.exists():
+            try:
+                lines = self.cache_log_path.read_bytes().splitlines()
+            except OSError:
+                lines = []
+            torn = False
+            for line in lines:
+                try:
+                    entry = _json_loads(line)
+                except ValueError:
+                    torn = True
+                    continue
+                if (
+                    isinstance(entry, list)
+                    and len(entry) == 2
+                    and isinstance(entry[0], str)
+                    and isinstance(entry[1], dict)
+                ):
+                    cache[entry[0]] = entry[1]
+                    cache.move_to_end(entry[0])
+                    self._unsaved_entries += 1
+            if torn:
+                # A run killed mid-append left a partial line; compact now so the
+                # next append doesn't land on the end of it.
+                self._evict(cache)
+                self._cache = cache
+                self._save_cache()
+        self._evict(cache)
+        return cache
+
+    def _append_cache_entry(self, key: str, value: Dict[str, Any]) -> None:
+        # Caller holds self._lock.
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        self._evict(self._cache)
+        if not self.cache_enabled:
+            return
+        self._unsaved_entries += 1
+        if self.cache_writeback:
+            return
+        self.cache_log_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.cache_log_path.open("ab") as handle:
+            handle.write(_json_dumps([key, value]) + b"\n")
+        if self._unsaved_entries >= self.cache_compact_entries:
+            self._save_cache()
+
+    def _evict(self, cache: OrderedDict[str, Dict[str, Any]]) -> None:
+        while len(cache) > self.cache_max_entries:
+            cache.popitem(last=False)
 
     def _save_cache(self) -> None:
         if not self.cache_enabled:
             return
         self.cache_path.parent.mkdir(parents=True, exist_ok=True)
-        self.cache_path.write_text(
-            json.dumps(self._cache, indent=2, sort_keys=True), encoding="utf-8"
-        )
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                if self._cache_compressed:
+                    handle.write(gzip.compress(_json_dumps(self._cache), compresslevel=1))
+                else:
+                    handle.write(_json_dumps(self._cache, pretty=True))
+            os.replace(tmp_name, self.cache_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        # Everything in the log is now in the snapshot.
+        self.cache_log_path.unlink(missing_ok=True)
+        self._unsaved_entries = 0
+
+    def flush_cache(self) -> None:
+        with self._lock:
+            if self._unsaved_entries:
+                self._save_cache()
 
     def _cache_key(
         self,
@@ -196,19 +409,145 @@ class VLMClient:
         report_master: Path,
         report_sample: Path,
     ) -> str:
-        hasher = hashlib.sha256()
-        hasher.update(VLM_CACHE_VERSION.encode("utf-8"))
-        hasher.update(self.model_name.encode("utf-8"))
-        for path in (pq_master, pq_sample, report_master, report_sample):
-            hasher.update(path.read_bytes())
-        return hasher.hexdigest()
+        key_parts = [VLM_CACHE_VERSION, self.model_name, f"edge={self.image_max_edge}"]
+        key_parts.extend(
+            self._file_digest(path)
+            for path in (pq_master, pq_sample, report_master, report_sample)
+        )
+        return hashlib.sha256("|".join(key_parts).encode("utf-8")).hexdigest()
+
+    def _file_digest(self, path: Path) -> str:
+        stat_key = _stat_key(path)
+        digest = self._digest_cache.get(stat_key)
+        if digest is None:
+            digest = _sha256_file(path)
+            self._digest_cache[stat_key] = digest
+        return digest
+
+    def _connection(self) -> http.client.HTTPSConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = _open_connection(self.timeout_seconds)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _post(
+        self, path: str, body: bytes, headers: Dict[str, str]
+    ) -> Tuple[bytes, http.client.HTTPMessage]:
+        connection = self._connection()
+        headers = {"Accept-Encoding": "gzip", **headers}
+        while True:
+            reused = connection.sock is not None
+            try:
+                connection.request("POST", path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, OSError) as exc:
+                connection.close()
+                if reused and isinstance(exc, (ConnectionResetError, BrokenPipeError)):
+                    # The server dropped an idle keep-alive socket; reconnect once.
+                    continue
+                raise error.URLError(exc) from exc
+        if response.status >= 400:
+            raise error.HTTPError(
+                f"https://{GEMINI_HOST}{path.split('?', 1)[0]}",
+                response.status,
+                response.reason,
+                response.headers,
+                None,
+            )
+        if response.headers.get("Content-Encoding", "").lower() == "gzip":
+            try:
+                data = gzip.decompress(data)
+            except (OSError, EOFError, zlib.error) as exc:
+                raise error.URLError(exc) from exc
+        return data, response.headers
+
+    def _post_json(self, path: str, body: bytes) -> bytes:
+        data, _headers = self._post(path, body, _JSON_HEADERS)
+        return data
+
+    def _upload_file(self, path: Path, data: bytes) -> str:
+        mime_type = _image_mime_type(path)
+        _body, start_headers = self._post(
+            self._upload_path,
+            _json_dumps({"file": {"display_name": path.name}}),
+            {
+                "Content-Type": "application/json",
+                "X-Goog-Upload-Protocol": "resumable",
+                "X-Goog-Upload-Command": "start",
+                "X-Goog-Upload-Header-Content-Length": str(len(data)),
+                "X-Goog-Upload-Header-Content-Type": mime_type,
+            },
+        )
+        upload_url = parse.urlsplit(start_headers.get("X-Goog-Upload-URL", ""))
+        if upload_url.hostname != GEMINI_HOST:
+            raise ValueError("Gemini file upload did not return an upload URL.")
+        body, _headers = self._post(
+            f"{upload_url.path}?{upload_url.query}",
+            data,
+            {
+                "Content-Length": str(len(data)),
+                "X-Goog-Upload-Offset": "0",
+                "X-Goog-Upload-Command": "upload, finalize",
+            },
+        )
+        uri = _json_loads(body).get("file", {}).get("uri")
+        if not isinstance(uri, str) or not uri:
+            raise ValueError("Gemini file upload response missing file uri.")
+        return uri
+
+    def _image_part(self, path: Path) -> Dict[str, Any]:
+        mime_type = _image_mime_type(path)
+        digest = self._file_digest(path)
+        uri = self._file_uri_cache.get(digest)
+        if uri is not None:
+            return {"fileData": {"mimeType": mime_type, "fileUri": uri}}
+        encoded = self._encoded_cache.get(digest)
+        if encoded is None:
+            data = _prepare_image(path, self.image_max_edge)
+            if len(data) >= self.file_upload_min_bytes:
+                try:
+                    uri = self._upload_file(path, data)
+                except (OSError, ValueError, http.client.HTTPException):
+                    uri = None
+                if uri is not None:
+                    self._file_uri_cache[digest] = uri
+                    return {"fileData": {"mimeType": mime_type, "fileUri": uri}}
+            # Small crops (and failed uploads) go inline; an upload costs two extra round trips.
+            encoded = base64.b64encode(data).decode("ascii")
+            self._encoded_cache[digest] = encoded
+        return {"inlineData": {"mimeType": mime_type, "data": encoded}}
+
+    def close(self) -> None:
+        self.flush_cache()
+        # The exit hook is only a safety net; dropping it lets a closed client be freed.
+        atexit.unregister(self.flush_cache)
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            connection.close()
+
+    def __enter__(self) -> VLMClient:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
 
     def _throttle(self) -> None:
         if self.min_seconds_between_calls <= 0:
             return
-        elapsed = time.time() - self._last_request_at
-        if elapsed < self.min_seconds_between_calls:
-            time.sleep(self.min_seconds_between_calls - elapsed)
+        # Reserve a slot under the lock but sleep outside it, so waiting threads
+        # queue up one interval apart instead of serializing on the lock.
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_seconds_between_calls
+        if slot > now:
+            time.sleep(slot - now)
 
     def compare(
         self,
@@ -236,9 +575,26 @@ class VLMClient:
                 reason="Gemini API key not configured (set GEMINI_API_KEY).",
                 confidence=0.0,
             )
+        # Byte-identical protocol/report pairs need no model call (digests are memoized).
+        # Kept behind the key check: without a key, rows stay UNSET for manual review.
+        if self._file_digest(pq_master) == self._file_digest(report_master) and (
+            self._file_digest(pq_sample) == self._file_digest(report_sample)
+        ):
+            return ComparisonResult(
+                match=True,
+                reason="Protocol and report images are identical.",
+                confidence=1.0,
+                source="identical_crops",
+            )
+
         cache_key = self._cache_key(pq_master, pq_sample, report_master, report_sample)
-        if self.cache_enabled and cache_key in self._cache:
-            return ComparisonResult.model_validate(self._cache[cache_key])
+        if self.cache_enabled:
+            with self._lock:
+                cached = self._cache.get(cache_key)
+                if cached is not None:
+                    self._cache.move_to_end(cache_key)
+            if cached is not None:
+                return ComparisonResult.model_validate(cached)
 
         prompt = (
             "You are validating a PQ protocol row against a report row.\n"
@@ -250,63 +606,31 @@ class VLMClient:
             "Rules: reason must be <= 8 words. confidence must be [0.0, 1.0]."
         )
 
+        # Built once per file and reused across retries and repeat comparisons.
+        image_parts = [
+            self._image_part(image)
+            for image in (pq_master, pq_sample, report_master, report_sample)
+        ]
         payload = {
             "contents": [
                 {
                     "role": "user",
-                    "parts": [
-                        {"text": prompt},
-                        {
-                            "inlineData": {
-                                "mimeType": "image/png",
-                                "data": _encode_image(pq_master),
-                            }
-                        },
-                        {
-                            "inlineData": {
-                                "mimeType": "image/png",
-                                "data": _encode_image(pq_sample),
-                            }
-                        },
-                        {
-                            "inlineData": {
-                                "mimeType": "image/png",
-                                "data": _encode_image(report_master),
-                            }
-                        },
-                        {
-                            "inlineData": {
-                                "mimeType": "image/png",
-                                "data": _encode_image(report_sample),
-                            }
-                        },
-                    ],
+                    "parts": [{"text": prompt}, *image_parts],
                 }
             ],
             "generationConfig": {
                 "temperature": 0.0,
                 "maxOutputTokens": 80,
+                "responseMimeType": "application/json",
             },
         }
-        endpoint = (
-            f"https://generativelanguage.googleapis.com/v1beta/models/{self.model_name}:"
-            "generateContent"
-        )
-        url = endpoint + "?" + parse.urlencode({"key": self.api_key})
-        req = request.Request(
-            url=url,
-            data=json.dumps(payload).encode("utf-8"),
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
+        body = _json_dumps(payload)
 
         last_error: Optional[Exception] = None
         for attempt in range(self.max_retries + 1):
             self._throttle()
             try:
-                with request.urlopen(req, timeout=self.timeout_seconds) as resp:
-                    response_payload = json.loads(resp.read().decode("utf-8"))
-                self._last_request_at = time.time()
+                response_payload = _json_loads(self._post_json(self._generate_path, body))
                 model_text = _extract_response_text(response_payload)
                 parsed_obj = _extract_candidate_obj(response_payload)
                 if parsed_obj is None:
@@ -323,19 +647,17 @@ class VLMClient:
                 if result.confidence is not None:
                     result.confidence = max(0.0, min(1.0, float(result.confidence)))
                 if self.cache_enabled:
-                    self._cache[cache_key] = result.model_dump()
-                    self._save_cache()
+                    with self._lock:
+                        self._append_cache_entry(cache_key, result.model_dump())
                 return result
             except error.HTTPError as exc:
                 last_error = exc
-                self._last_request_at = time.time()
                 if exc.code == 429 and attempt < self.max_retries:
                     time.sleep(2**attempt)
                     continue
                 break
             except (error.URLError, TimeoutError) as exc:
                 last_error = exc
-                self._last_request_at = time.time()
                 if attempt < self.max_retries:
                     time.sleep(2**attempt)
                     continue
@@ -353,3 +675,31 @@ class VLMClient:
             confidence=0.0,
         )
 
+    def compare_batch(
+        self,
+        tasks: Sequence[CompareTask],
+        max_workers: Optional[int] = None,
+        on_result: Optional[Callable[[int, ComparisonResult], None]] = None,
+    ) -> List[ComparisonResult]:
+        """Run compare() for each 4-image task concurrently; results keep task order.
+
+        Requests still honor the shared throttle. on_result is called from the
+        calling thread as each task finishes, with the task's index.
+        """
+        results: List[Optional[ComparisonResult]] = [None] * len(tasks)
+        executor = ThreadPoolExecutor(max_workers=max_workers or self.max_concurrency)
+        try:
+            futures = {
+                executor.submit(self.compare, *task): index
+                for index, task in enumerate(tasks)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                result = future.result()
+                results[index] = result
+                if on_result is not None:
+                    on_result(index, result)
+        finally:
+            # On error, drop queued comparisons instead of sending (and paying for) them.
+            executor.shutdown(wait=True, cancel_futures=True)
+        return [result for result in results if result is not None]